@@ -1,107 +1,317 @@
-import datetime
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal
-import math
+import io
+from itertools import repeat
+import os
 
+import numpy as np
+import pandas as pd
 
-def run_billing(file):
+USAGE_COLUMNS = ["account_number", "origination_number", "termination_number", "call_start", "call_stop"]
+
+INTERNATIONAL, DOMESTIC, LOCAL = 0, 1, 2
+CALL_TYPES = ("international", "domestic", "local")
+
+# Per call type, indexed by INTERNATIONAL/DOMESTIC/LOCAL: flat fee and per-minute rate in cents
+_BASE_CENTS = np.array([100, 0, 0], dtype=np.int64)
+_RATE_CENTS = np.array([20, 10, 2], dtype=np.int64)
+
+
+def run_billing(file, workers=1):
     """Reads csv file containing phone usage statistics, outputs billing/charges per customer in csv.
 
     Args:
         file (str): Path/name of input file containing usage statistics
+        workers (int): Number of processes to split the input file across, 1 bills it in the calling process
     """
-    with open(file, "r") as f:
-        lines = f.readlines()
-
-    call_infos = []
-    rows = lines[1:]
-    for row in rows:
-        values = row.split(",")
-        call_infos.append(CallInfo(
-            account_number=values[0],
-            origination_number=values[1],
-            termination_number=values[2],
-            call_start=values[3],
-            call_stop=values[4].strip(),  # strip newline character off end of row
-        ))
-
-    bills = calculate_bills(call_infos)
-
+    if workers > 1:
+        bills = calculate_bills_in_parallel(file, workers)
+    else:
+        usage = pd.read_csv(
+            file, usecols=range(len(USAGE_COLUMNS)), names=USAGE_COLUMNS, header=0, dtype=str, memory_map=True
+        )
+        bills = calculate_bills_from_columns(*(usage[column].to_numpy() for column in USAGE_COLUMNS))
+
+    headers = "account_number,minutes_international,number_international,minutes_domestic,number_domestic,minutes_local,number_local,charge\n"
+    rows = "".join(f"{bill}\n" for bill in bills)
     with open("output.csv", "w") as f:
-        headers = "account_number,minutes_international,number_international,minutes_domestic,number_domestic,minutes_local,number_local,charge\n"
-        f.write(headers)
-        for bill in bills:
-            f.write(str(bill) + "\n")
+        f.write(headers + rows)
 
 
-def calculate_bills(call_infos):
-    """Calculate bills/charges for calls. Aggregate results by customer/account_number.
+def calculate_bills_from_columns(account_numbers, origination_numbers, termination_numbers, call_starts, call_stops):
+    """Calculate bills/charges for calls stored column-wise, one array per usage field.
 
     Args:
-        call_infos (list[CallInfo]): Phone usage statistics for individual calls
+        account_numbers (numpy.ndarray): ID of account making each call
+        origination_numbers (numpy.ndarray): Number making each call
+        termination_numbers (numpy.ndarray): Number being called
+        call_starts (numpy.ndarray): Time each call started
+        call_stops (numpy.ndarray): Time each call ended
+    """
+    return _bills_from_totals(*_aggregate_calls(
+        account_numbers, origination_numbers, termination_numbers, call_starts, call_stops
+    ))
+
+
+def calculate_bills_in_parallel(file, workers):
+    """Calculate bills/charges for a usage csv file, splitting the work across processes.
+
+    Each process reads and aggregates its own byte range of the file, and the per-account totals are then merged,
+    keeping accounts in the order they first appear in the file.
+
+    Args:
+        file (str): Path/name of input file containing usage statistics
+        workers (int): Number of processes to split the input file across
+    """
+    with open(file, "rb") as f:
+        data_start = len(f.readline())
+    size = os.path.getsize(file)
+    step = max(-(-(size - data_start) // workers), 1)
+    bounds = list(range(data_start, size, step)) + [size]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partial_totals = list(executor.map(_aggregate_file_range, repeat(file), bounds[:-1], bounds[1:]))
+
+    if not partial_totals:
+        return []
+    accounts, metrics, charge_cents = (np.concatenate(parts) for parts in zip(*partial_totals))
+    account_ids, unique_accounts = pd.factorize(accounts, use_na_sentinel=False)
+    account_metrics = np.zeros((len(unique_accounts), metrics.shape[1]), dtype=np.int64)
+    np.add.at(account_metrics, account_ids, metrics)
+    account_charge_cents = np.zeros(len(unique_accounts), dtype=np.int64)
+    np.add.at(account_charge_cents, account_ids, charge_cents)
+    return _bills_from_totals(unique_accounts, account_metrics, account_charge_cents)
+
+
+def _aggregate_file_range(file, start, stop):
+    """Aggregate the calls on the csv lines that begin within [start, stop) bytes of the file, see _aggregate_calls.
+
+    Args:
+        file (str): Path/name of input file containing usage statistics
+        start (int): Byte offset to start reading from, must be past the header line
+        stop (int): Byte offset to stop reading at
+    """
+    with open(file, "rb") as f:
+        # A line straddling start belongs to the previous range, skip to the first line beginning at/after it
+        f.seek(start - 1)
+        f.readline()
+        data = f.read(max(stop - f.tell(), 0))
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+
+    if not data.strip():
+        empty = np.array([], dtype=object)
+        return _aggregate_calls(*([empty] * len(USAGE_COLUMNS)))
+    usage = pd.read_csv(
+        io.BytesIO(data), usecols=range(len(USAGE_COLUMNS)), names=USAGE_COLUMNS, header=None, dtype=str
+    )
+    return _aggregate_calls(*(usage[column].to_numpy() for column in USAGE_COLUMNS))
+
+
+def _aggregate_calls(account_numbers, origination_numbers, termination_numbers, call_starts, call_stops):
+    """Bill calls and sum the results per account.
+
+    Returns the distinct account numbers in order of first appearance, a matching array of metrics ordered as in
+    CustomerBill.metrics, and a matching array of charges in cents.
+
+    Args:
+        account_numbers (numpy.ndarray): ID of account making each call
+        origination_numbers (numpy.ndarray): Number making each call
+        termination_numbers (numpy.ndarray): Number being called
+        call_starts (numpy.ndarray): Time each call started
+        call_stops (numpy.ndarray): Time each call ended
     """
-    account_number_to_customer_bill_map = dict()
+    call_types, durations, charges = bill_calls(origination_numbers, termination_numbers, call_starts, call_stops)
 
-    for info in call_infos:
-        bill = CustomerBill(info)
-        if account_number_to_customer_bill_map.get(info.account_number) is None:
-            account_number_to_customer_bill_map[info.account_number] = bill
-        else:
-            account_number_to_customer_bill_map[info.account_number].update(bill)
+    # Number accounts densely in order of first appearance, then sum every metric per account with bincount
+    account_ids, unique_accounts = pd.factorize(np.asarray(account_numbers), use_na_sentinel=False)
+    num_accounts = len(unique_accounts)
+    num_call_types = len(CALL_TYPES)
+    slots = account_ids * num_call_types + call_types
+    metrics = np.empty((num_accounts, 2 * num_call_types), dtype=np.int64)
+    metrics[:, 0::2] = np.bincount(slots, weights=durations, minlength=num_accounts * num_call_types) \
+        .reshape(num_accounts, num_call_types)
+    metrics[:, 1::2] = np.bincount(slots, minlength=num_accounts * num_call_types) \
+        .reshape(num_accounts, num_call_types)
+    charge_cents = np.bincount(account_ids, weights=charges, minlength=num_accounts).astype(np.int64)
+    return np.asarray(unique_accounts, dtype=object), metrics, charge_cents
 
-    return list(account_number_to_customer_bill_map.values())
 
+def _bills_from_totals(account_numbers, metrics, charge_cents):
+    """Create one CustomerBill per account from the per-account totals returned by _aggregate_calls."""
+    return [
+        CustomerBill.from_totals(account_number, *account_metrics, account_charge_cents)
+        for account_number, account_metrics, account_charge_cents
+        in zip(account_numbers.tolist(), metrics.tolist(), charge_cents.tolist())
+    ]
 
-class PhoneNumber:
-    """Simple data structure for interacting with phone numbers.
+
+def bill_calls(origination_numbers, termination_numbers, call_starts, call_stops):
+    """Classify, time and charge every call, computing each call type and duration only once.
+
+    Returns the call types, durations in minutes and charges in cents, see classify_calls, compute_durations
+    and compute_charges.
+
+    Args:
+        origination_numbers (numpy.ndarray): Number making each call
+        termination_numbers (numpy.ndarray): Number being called
+        call_starts (numpy.ndarray): Time each call started
+        call_stops (numpy.ndarray): Time each call ended
+    """
+    call_types = classify_calls(origination_numbers, termination_numbers)
+    durations = compute_durations(call_starts, call_stops)
+    return call_types, durations, compute_charges(call_types, durations)
+
+
+def compute_durations(call_starts, call_stops):
+    """Find how long each call lasted in minutes, rounded up.
 
     Args:
-        phone_number (str): Phone numbers take the form +(1-digit-country-code)(3-digit-area-code)(7-digits)
+        call_starts (numpy.ndarray): Time each call started, as datetime64 values or ISO formatted strings
+        call_stops (numpy.ndarray): Time each call ended, as datetime64 values or ISO formatted strings
     """
+    starts = np.asarray(call_starts, dtype="datetime64[us]")
+    stops = np.asarray(call_stops, dtype="datetime64[us]")
+    seconds = (stops - starts).astype("timedelta64[s]").astype(np.int64)
+    return (-(-seconds // 60)).astype(np.int32)
+
 
-    def __init__(self, phone_number):
-        phone_number = phone_number.strip("+")
-        self.country_code = phone_number[0]
-        self.area_code = phone_number[1:4]
-        self.number = phone_number[4:]
+def classify_calls(origination_numbers, termination_numbers):
+    """Determine whether each call was international, domestic, or local.
+
+    Returns the INTERNATIONAL, DOMESTIC or LOCAL code of every call.
+
+    Args:
+        origination_numbers (numpy.ndarray): Number making each call
+        termination_numbers (numpy.ndarray): Number being called
+    """
+    origin_country_codes, origin_area_codes = _split_phone_numbers(origination_numbers)
+    termination_country_codes, termination_area_codes = _split_phone_numbers(termination_numbers)
+    international = origin_country_codes != termination_country_codes
+    domestic = (origin_area_codes != termination_area_codes).any(axis=1)
+    return np.where(international, INTERNATIONAL, np.where(domestic, DOMESTIC, LOCAL)).astype(np.int8)
+
+
+def _split_phone_numbers(phone_numbers):
+    """Slice country codes and area codes out of phone numbers.
+
+    Phone numbers take the form +(1-digit-country-code)(3-digit-area-code)(7-digits), so only the first five
+    characters of each number are looked at.
+
+    Args:
+        phone_numbers (numpy.ndarray): Phone numbers to split
+    """
+    prefixes = np.asarray(phone_numbers, dtype="U5")
+    characters = prefixes.view("U1").reshape(len(prefixes), 5)
+    missing_plus = characters[:, 0] != "+"
+    if missing_plus.any():
+        raise ValueError(f"Phone numbers must start with '+', got: {np.asarray(phone_numbers)[missing_plus][:5]}")
+    return characters[:, 1], characters[:, 2:]
+
+
+def compute_charges(call_types, durations):
+    """Determine how much to charge for each call, in integer cents.
+
+    International calls cost $1 plus $0.20/minute, domestic calls $0.10/minute and local calls $0.02/minute.
+
+    Args:
+        call_types (numpy.ndarray): Type code of each call, as returned by classify_calls
+        durations (numpy.ndarray): Length of each call in minutes, as returned by compute_durations
+    """
+    return _BASE_CENTS[call_types] + _RATE_CENTS[call_types] * np.asarray(durations)
+
+
+def _cents_to_decimal(cents):
+    """Convert an integer amount of cents into a dollar amount with two decimal places."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _format_cents(cents):
+    """Format an integer amount of cents as dollars with two decimal places, without going through Decimal."""
+    dollars, remainder = divmod(abs(cents), 100)
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{dollars}.{remainder:02d}"
+
+
+def calculate_bills(call_infos):
+    """Calculate bills/charges for calls. Aggregate results by customer/account_number.
+
+    Args:
+        call_infos (list[CallInfo]): Phone usage statistics for individual calls
+    """
+    columns = list(zip(*call_infos)) or [()] * len(USAGE_COLUMNS)
+    return calculate_bills_from_columns(*(np.array(column) for column in columns))
+
+
+def _metric(index, doc):
+    """Expose one entry of CustomerBill.metrics as a read-only attribute."""
+    return property(lambda self: self.metrics[index], doc=doc)
 
 
 class CustomerBill:
     """Object representing a given customer/account's activity and charges.
 
+    Call metrics are kept in a single list, ordered as minutes then number of calls for each call type, so that
+    a call's type indexes straight into it.
+
     Args:
         call_info (CallInfo): Phone usage statistics for a single call
     """
 
+    __slots__ = ("account_number", "metrics", "charge_cents")
+
+    minutes_international = _metric(2 * INTERNATIONAL, "Total minutes of international calls")
+    num_international = _metric(2 * INTERNATIONAL + 1, "Number of international calls")
+    minutes_domestic = _metric(2 * DOMESTIC, "Total minutes of domestic calls")
+    num_domestic = _metric(2 * DOMESTIC + 1, "Number of domestic calls")
+    minutes_local = _metric(2 * LOCAL, "Total minutes of local calls")
+    num_local = _metric(2 * LOCAL + 1, "Number of local calls")
+
     def __init__(self, call_info):
         self.account_number = call_info.account_number
-        self.minutes_international = 0
-        self.num_international = 0
-        self.minutes_domestic = 0
-        self.num_domestic = 0
-        self.minutes_local = 0
-        self.num_local = 0
-        self.set_call_metrics(call_info)
-        self.charge = call_info.calculate_charge_for_call()
-
-    def set_call_metrics(self, call_info):
+        self.metrics = [0] * (2 * len(CALL_TYPES))
+        call_type, duration, self.charge_cents = call_info.classify_and_bill()
+        self.set_call_metrics(call_type, duration)
+
+    @classmethod
+    def from_totals(cls, account_number, minutes_international, num_international, minutes_domestic, num_domestic,
+                    minutes_local, num_local, charge_cents):
+        """Create a CustomerBill from metrics already aggregated over all of an account's calls.
+
+        Args:
+            account_number (str): ID of account being billed
+            minutes_international (int): Total minutes of international calls
+            num_international (int): Number of international calls
+            minutes_domestic (int): Total minutes of domestic calls
+            num_domestic (int): Number of domestic calls
+            minutes_local (int): Total minutes of local calls
+            num_local (int): Number of local calls
+            charge_cents (int): Total charge for the account, in integer cents
+        """
+        bill = cls.__new__(cls)
+        bill.account_number = account_number
+        bill.metrics = [minutes_international, num_international, minutes_domestic, num_domestic, minutes_local,
+                        num_local]
+        bill.charge_cents = charge_cents
+        return bill
+
+    @property
+    def charge(self):
+        """Total charge for the account in dollars."""
+        return _cents_to_decimal(self.charge_cents)
+
+    def set_call_metrics(self, call_type, duration):
         """Sets metrics for a given CustomerBill object upon instantiation
 
         Args:
-            call_info (CallInfo): Phone usage statistics for a single call
+            call_type (int): INTERNATIONAL, DOMESTIC or LOCAL
+            duration (int): Length of the call in minutes
         """
-        duration = call_info.get_call_duration()
-        call_type = call_info.get_call_type()
-        if call_type == "international":
-            self.minutes_international += duration
-            self.num_international += 1
-        elif call_type == "domestic":
-            self.minutes_domestic += duration
-            self.num_domestic += 1
-        elif call_type == "local":
-            self.minutes_local += duration
-            self.num_local += 1
-        else:
+        if call_type not in (INTERNATIONAL, DOMESTIC, LOCAL):
             raise NotImplementedError(f"Unhandled call_type encountered: {call_type}")
+        self.metrics[2 * call_type] += duration
+        self.metrics[2 * call_type + 1] += 1
 
     def update(self, new_call_info):
         """Aggregate billing metrics from two CustomerBill objects into one
@@ -113,20 +323,14 @@ class CustomerBill:
               f"This account: {self.account_number}, Other account: {new_call_info.account_number}"
         assert self.account_number == new_call_info.account_number, msg
 
-        self.minutes_international += new_call_info.minutes_international
-        self.minutes_domestic += new_call_info.minutes_domestic
-        self.minutes_local += new_call_info.minutes_local
-        self.num_international += new_call_info.num_international
-        self.num_domestic += new_call_info.num_domestic
-        self.num_local += new_call_info.num_local
-        self.charge += new_call_info.charge.quantize(Decimal('1.00'))
+        self.metrics = [total + other for total, other in zip(self.metrics, new_call_info.metrics)]
+        self.charge_cents += new_call_info.charge_cents
 
     def __repr__(self):
-        return f"{self.account_number},{self.minutes_international},{self.num_international},{self.minutes_domestic}," \
-               f"{self.num_domestic},{self.minutes_local},{self.num_local},{self.charge.quantize(Decimal('1.00'))}"
+        return f"{self.account_number},{','.join(map(str, self.metrics))},{_format_cents(self.charge_cents)}"
 
 
-class CallInfo:
+class CallInfo(namedtuple("CallInfo", USAGE_COLUMNS)):
     """Represents usage statistics about a given call, and exposes methods to bill that call.
 
     Args:
@@ -137,47 +341,34 @@ class CallInfo:
         call_stop (str): Time call ended
     """
 
-    def __init__(self, account_number, origination_number, termination_number, call_start, call_stop):
-        self.account_number = account_number
-        self.origination_number = origination_number
-        self.termination_number = termination_number
-        self.call_start = call_start
-        self.call_stop = call_stop
+    __slots__ = ()
 
     def get_call_duration(self):
         """Find how long the call lasted in minutes, rounded up."""
-        start = datetime.datetime.fromisoformat(self.call_start)
-        stop = datetime.datetime.fromisoformat(self.call_stop)
-        difference = stop - start
-        return math.ceil(difference.seconds / 60)
+        return int(compute_durations([self.call_start], [self.call_stop])[0])
+
+    def classify_and_bill(self):
+        """Determine the call's type code, duration in minutes and charge in integer cents in one pass."""
+        call_types, durations, charges = bill_calls(
+            [self.origination_number], [self.termination_number], [self.call_start], [self.call_stop]
+        )
+        return int(call_types[0]), int(durations[0]), int(charges[0])
+
+    def get_call_type_code(self):
+        """Determine whether call was INTERNATIONAL, DOMESTIC, or LOCAL."""
+        return int(classify_calls([self.origination_number], [self.termination_number])[0])
 
     def get_call_type(self):
         """Determine whether call was international, domestic, or local."""
-        origin_number = PhoneNumber(self.origination_number)
-        termination_number = PhoneNumber(self.termination_number)
-        if origin_number.country_code != termination_number.country_code:
-            return "international"
-        elif origin_number.area_code != termination_number.area_code:
-            return "domestic"
-        else:
-            return "local"
+        return CALL_TYPES[self.get_call_type_code()]
+
+    def calculate_charge_cents_for_call(self):
+        """Determine how much to charge account for the call, in integer cents."""
+        return self.classify_and_bill()[2]
 
     def calculate_charge_for_call(self):
         """Determine how much to charge account for the call."""
-        duration = self.get_call_duration()
-        call_type = self.get_call_type()
-        if call_type == "international":
-            base = 1
-            rate = .2
-        elif call_type == "domestic":
-            base = 0
-            rate = .1
-        elif call_type == "local":
-            base = 0
-            rate = .02
-        else:
-            raise NotImplementedError(f"Unhandled call_type encountered: {call_type}")
-        return Decimal(base + rate * duration).quantize(Decimal('1.00'))
+        return _cents_to_decimal(self.calculate_charge_cents_for_call())
 
 
 if __name__ == "__main__":
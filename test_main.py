@@ -1,7 +1,12 @@
+import pathlib
+
+import numpy as np
 import pytest
 import main
 from decimal import Decimal
 
+REPO_ROOT = pathlib.Path(__file__).parent
+
 
 @pytest.fixture(scope="session")
 def international_call_info():
@@ -51,6 +56,14 @@ def test_get_call_duration_round_up():
     assert call_info.get_call_duration() == 3
 
 
+def test_compute_durations():
+    durations = main.compute_durations(
+        np.array(["2022-06-24 15:31:11.696409", "2022-06-24 15:31:11.696409", "2022-06-24 23:59:30"]),
+        np.array(["2022-06-24 15:33:11.696409", "2022-06-24 15:33:12.696409", "2022-06-25 00:00:10"]),
+    )
+    assert durations.tolist() == [2, 3, 1]
+
+
 def test_get_call_type_international(international_call_info):
     assert international_call_info.get_call_type() == "international"
 
@@ -63,6 +76,22 @@ def test_get_call_type_local(local_call_info):
     assert local_call_info.get_call_type() == "local"
 
 
+def test_classify_calls():
+    call_types = main.classify_calls(
+        np.array(["+15555555555", "+15555555555", "+15555555555"]),
+        np.array(["+26666666666", "+16666666666", "+15556666666"]),
+    )
+    assert call_types.tolist() == [main.INTERNATIONAL, main.DOMESTIC, main.LOCAL]
+
+
+def test_compute_charges():
+    charges = main.compute_charges(
+        np.array([main.INTERNATIONAL, main.DOMESTIC, main.LOCAL]),
+        np.array([2, 3, 4]),
+    )
+    assert charges.tolist() == [140, 30, 8]
+
+
 def test_calculate_international_charge(international_call_info):
     assert international_call_info.calculate_charge_for_call() == Decimal(1.4).quantize(Decimal('1.00'))
 
@@ -75,11 +104,9 @@ def test_calculate_local_charge(local_call_info):
     assert local_call_info.calculate_charge_for_call() == Decimal(.04).quantize(Decimal('1.00'))
 
 
-def test_phone_number(local_call_info):
-    number = main.PhoneNumber(local_call_info.termination_number)
-    assert number.country_code == "1"
-    assert number.area_code == "555"
-    assert number.number == "6666666"
+def test_classify_calls_without_plus_prefix():
+    with pytest.raises(ValueError):
+        main.classify_calls(np.array(["+15555555555"]), np.array(["15556666666"]))
 
 
 def test_international_customer_bill(international_call_info):
@@ -115,6 +142,12 @@ def test_local_customer_bill(local_call_info):
     assert bill.charge == Decimal(.04).quantize(Decimal('1.00'))
 
 
+def test_customer_bill_from_totals():
+    bill = main.CustomerBill.from_totals("1", 2, 1, 12, 2, 0, 0, 260)
+    assert bill.charge == Decimal("2.60")
+    assert str(bill) == "1,2,1,12,2,0,0,2.60"
+
+
 def test_update_customer_bill(international_call_info, domestic_call_info):
     bill = main.CustomerBill(international_call_info)
     domestic_bill = main.CustomerBill(domestic_call_info)
@@ -144,6 +177,10 @@ def test_update_customer_bill_with_different_account_number(international_call_i
         bill.update(other_bill)
 
 
+def test_calculate_no_bills():
+    assert main.calculate_bills([]) == []
+
+
 def test_calculate_single_bill(international_call_info):
     bills = main.calculate_bills([international_call_info])
     assert len(bills) == 1
@@ -200,3 +237,28 @@ def test_calculate_multiple_bills_for_multiple_accounts(international_call_info,
     assert account_2_bill.minutes_local == 0
     assert account_2_bill.num_local == 0
     assert account_2_bill.charge == Decimal(.2).quantize(Decimal('1.00'))
+
+
+def test_calculate_bills_from_columns():
+    bills = main.calculate_bills_from_columns(
+        np.array(["1", "2", "1"]),
+        np.array(["+15555555555", "+15555555555", "+15555555555"]),
+        np.array(["+26666666666", "+16666666666", "+16666666666"]),
+        np.array(["2022-06-24 15:31:11.696409"] * 3),
+        np.array(["2022-06-24 15:33:11.696409"] * 3),
+    )
+    assert [bill.account_number for bill in bills] == ["1", "2"]
+    assert str(bills[0]) == "1,2,1,2,1,0,0,1.60"
+    assert str(bills[1]) == "2,0,0,2,1,0,0,0.20"
+
+
+def test_run_billing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main.run_billing(REPO_ROOT / "usage.csv")
+    assert (tmp_path / "output.csv").read_text() == (REPO_ROOT / "sample_output.csv").read_text()
+
+
+def test_run_billing_in_parallel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main.run_billing(REPO_ROOT / "usage.csv", workers=3)
+    assert (tmp_path / "output.csv").read_text() == (REPO_ROOT / "sample_output.csv").read_text()